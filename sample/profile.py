@@ -2,33 +2,25 @@
 
 import logging
 import os
-from pathlib import Path
 import sys
-import shutil
 
-import platformdirs
+from pybwrap.constants import DEFAULT_PATH, HOME as _HOME, SHELL, XDG_CONFIG_HOME
+from pybwrap.path import _PathLike
 
-from pybwrap.bwrap import BindMode, Bwrap, BwrapSandbox
-from pybwrap.cli import BwrapArgumentParser, handle_binds
+HOME = str(_HOME)
+PROFILE_STORAGE = os.path.join(HOME, "profiles")
+SANDBOX_PATH = (".bin",) + DEFAULT_PATH
 
-PROFILE_STORAGE = Path.home() / "profiles"
-
-
-logging.basicConfig(
-    level=logging.ERROR,
-    format="%(levelname)s:%(name)s: %(message)s",
-)
 logger = logging.getLogger("profile")
 
-home = Path.home()
 
+def build_parser():
+    from pybwrap.cli import BwrapArgumentParser
 
-def main():
-    shell = os.getenv("SHELL", "bash")
     parser = BwrapArgumentParser(
         description="Run wine in bubblewrap sandbox",
         add_help=True,
-        default_cmd=[shell],
+        default_cmd=[SHELL],
     )
     parser.add_flag_keep()
     parser.add_flag_cwd()
@@ -46,47 +38,94 @@ def main():
         action="store_true",
         help="Create the profile if it doesn't exist",
     )
-    args = parser.parse_args()
+    return parser
+
+
+def fast_parse_args(argv: list[str]):
+    """Parse the common `profile NAME [-- COMMAND...]` form without argparse
+
+    Returns None for anything else, which must go through build_parser().
+    """
+    if not argv or argv[0].startswith("-") or argv[1:2] not in ([], ["--"]):
+        return None
+
+    from types import SimpleNamespace
+
+    return SimpleNamespace(
+        profile=argv[0],
+        command=argv[2:] or [SHELL],
+        list=False,
+        create=False,
+        keep=False,
+        cwd=False,
+        bind=None,
+        etc=False,
+        keep_user=False,
+        user="user",
+        loglevel=logging.ERROR,
+    )
+
+
+def main():
+    from pybwrap.bwrap import BindMode, BwrapSandbox
+
+    args = fast_parse_args(sys.argv[1:])
+    if args is None:
+        args = build_parser().parse_args()
+    if args.loglevel < logging.ERROR:
+        logging.basicConfig(
+            level=logging.ERROR,
+            format="%(levelname)s:%(name)s: %(message)s",
+        )
+
     if args.list:
         logger.info("listing profiles")
-        for d in PROFILE_STORAGE.iterdir():
-            if d.is_dir() and not d.name.startswith("."):
-                print(str(d.name))
+        with os.scandir(PROFILE_STORAGE) as it:
+            for d in it:
+                if d.is_dir() and not d.name.startswith("."):
+                    print(d.name)
         return 0
 
     if not args.profile:
-        parser.error("a profile name is required")
+        return usage_error("a profile name is required")
 
     profile = args.profile
 
-    profile_path = PROFILE_STORAGE / profile
+    profile_path = os.path.join(PROFILE_STORAGE, profile)
 
     if len(args.command) == 0:
-        parser.error("a command is required")
+        return usage_error("a command is required")
 
     sandbox: BwrapSandbox = BwrapSandbox(
         clearenv=True,
-        profile=str(profile_path),
+        profile=profile_path,
         keep_child=args.keep,
         hostname=profile,
         loglevel=args.loglevel,
-        path=(".bin",) + Bwrap.DEFAULT_PATH,
+        path=SANDBOX_PATH,
         keep_user=args.keep_user,
         user=args.user,
     )
     sandbox.resolve_path
     logger.setLevel(args.loglevel)
 
-    if not profile_path.exists():
+    if not os.path.exists(profile_path):
         if not args.create:
-            parser.error(f"Profile {profile} does not exist!")
-        logger.info(f"profile `{profile}` not found, creating...")
-        profile_path.mkdir()
+            return usage_error(f"Profile {profile} does not exist!")
+        logger.info("profile `%s` not found, creating...", profile)
+        os.mkdir(profile_path)
         # copy .config/fish and .config/
-        config_home = platformdirs.user_config_path()
-        copy(config_home / "fish", profile_path / ".config/fish")
-        copy(config_home / "lf", profile_path / ".config/lf")
-        copy(config_home / "bat", profile_path / ".config/bat")
+        # all three trees share one pool, so their files are copied as a batch
+        with copy_pool() as pool:
+            jobs = [
+                copy(
+                    os.path.join(XDG_CONFIG_HOME, name),
+                    os.path.join(profile_path, ".config", name),
+                    pool,
+                )
+                for name in ("fish", "lf", "bat")
+            ]
+        wait_copies(jobs)
 
     sandbox.unshare()
     sandbox.desktop()
@@ -96,30 +135,96 @@ def main():
         ".local/bin",
         {"src": ".local/bin", "mode": BindMode.RO},
         mode=BindMode.RW,
-        src_anchor=home,
+        src_anchor=HOME,
         dest_anchor=sandbox.home,
     )
-    sandbox.dir(str(sandbox.home / ".bin"))
+    sandbox.dir(f"{sandbox.home}/.bin")
     if args.bind:
-        handle_binds(args.bind, sandbox.bind)
+        from pybwrap.cli import parse_binds
+
+        try:
+            binds = parse_binds(args.bind)
+        except ValueError as e:
+            return usage_error(str(e))
+        sandbox.bind_all(*binds)
     if args.cwd:
         sandbox.bind(os.getcwd(), mode=BindMode.RW)
         sandbox.chdir()
     sandbox.exec(args.command)
 
 
-def copy(src, dest=None):
+def usage_error(message: str) -> int:
+    print(f"{os.path.basename(sys.argv[0])}: error: {message}", file=sys.stderr)
+    return 2
+
+
+def copy(src: _PathLike, dest: _PathLike | None = None, pool=None):
+    """Copy a directory tree, copying regular files on a thread pool.
+
+    The directory skeleton is created up front and every file copy is submitted
+    to the pool. Directory metadata is only applied by wait_copies() once all
+    files are written, so a read-only source directory cannot lock the workers
+    out of its copy.
+
+    If a pool is given, the pending (files, dirs) job is returned so several
+    trees can share one pool; otherwise copy() waits for its own pool.
+    """
+    import shutil
+
+    if pool is None:
+        with copy_pool() as pool:
+            job = copy(src, dest, pool)
+        wait_copies([job])
+        return None
+
     dest = dest or src
-    if not isinstance(src, Path):
-        src = Path(src)
-    if not isinstance(dest, Path):
-        dest = Path(dest)
-    if not src.exists():
-        logger.warning(f"Source directory '{src}' does not exist.")
-        return
+    if not os.path.exists(src):
+        logger.warning("Source directory '%s' does not exist.", src)
+        return [], []
+    files = []
+    dirs = []
+    try:
+        # like copytree, follow symlinks and fail if dest already exists
+        for root, dirnames, filenames in os.walk(src, followlinks=True):
+            target = os.path.join(dest, os.path.relpath(root, src))
+            if dirs:
+                os.mkdir(target)
+            else:
+                os.makedirs(target)
+            dirs.append((root, target))
+            for name in filenames:
+                files.append(
+                    pool.submit(
+                        shutil.copy2,
+                        os.path.join(root, name),
+                        os.path.join(target, name),
+                    )
+                )
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        sys.exit(1)
+    logger.info("Directory '%s' queued for copying to '%s'.", src, dest)
+    return files, dirs
+
+
+def copy_pool():
+    from concurrent.futures import ThreadPoolExecutor
+
+    return ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4))
+
+
+def wait_copies(jobs):
+    """Wait for the (files, dirs) jobs from copy(), then copy directory metadata"""
+    import shutil
+
     try:
-        shutil.copytree(src, dest)
-        logger.info(f"Directory '{src}' copied to '{dest}' successfully.")
+        for files, _ in jobs:
+            for future in files:
+                future.result()
+        # bottom-up, so a read-only directory is sealed after its children
+        for _, dirs in jobs:
+            for src, dest in reversed(dirs):
+                shutil.copystat(src, dest)
     except Exception as e:
         print(f"An error occurred: {e}")
         sys.exit(1)
@@ -1,24 +1,43 @@
 #!/usr/bin/python
 import logging
 
-import platformdirs
-from pybwrap import BindMode, BwrapSandbox, BwrapArgumentParser, handle_binds, HOME
 import sys
 import os
-from pathlib import Path
 
+from pybwrap.constants import HOME, XDG_DATA_HOME
 
-DEFAULT_WINE_PREFIX = Path.home() / ".wine"
-DEFAULT_PROTON_PREFIX = platformdirs.user_data_path("proton")
-STEAM_PATH = platformdirs.user_data_path("Steam")
+DEFAULT_WINE_PREFIX = os.path.join(HOME, ".wine")
+DEFAULT_PROTON_PREFIX = XDG_DATA_HOME / "proton"
+STEAM_PATH = XDG_DATA_HOME / "Steam"
 PROTON_PATH = STEAM_PATH / "steamapps/common/Proton - Experimental"
+KEEP_ENV = (
+    "DXVK_CONFIG_FILE",
+    "DXVK_DEBUG",
+    "DXVK_ENABLE_NVAPI",
+    "DXVK_HUD",
+    "DXVK_LOG_LEVEL",
+    "DXVK_LOG_PATH",
+    "DXVK_STATE",
+    "DXVK_STATE_CACHE_PATH",
+    "GAMEMODERUNEXEC",
+    "MANGOHUD",
+    "MANGOHUD_CONFIG",
+    "PROTON_NO_ESYNC",
+    "PROTON_NO_FSYNC",
+    "PROTON_USE_WINED3D",
+    "VKD3D_CONFIG",
+    "VKD3D_FEATURE_LEVEL",
+    "VK_DRIVER_FILES",
+    "VK_INSTANCE_LAYERS",
+    "WINEDLLOVERRIDES",
+    "WINEFSYNC",
+    "WINEDEBUG",
+)
 
 
 def main():
-    logging.basicConfig(
-        level=logging.ERROR,
-        format="%(levelname)s:%(name)s: %(message)s",
-    )
+    from pybwrap import BindMode, BwrapSandbox, BwrapArgumentParser, parse_binds
+
     logger = logging.getLogger("swine")
 
     parser = BwrapArgumentParser(
@@ -68,8 +87,13 @@ def main():
     args = parser.parse_args()
 
     if len(args.command) == 0:
-        parser.error("a command is required")
+        return usage_error(parser.prog, "a command is required")
 
+    if args.loglevel < logging.ERROR:
+        logging.basicConfig(
+            level=logging.ERROR,
+            format="%(levelname)s:%(name)s: %(message)s",
+        )
     logger.setLevel(args.loglevel)
 
     if os.path.basename(__file__) == "proton":
@@ -88,29 +112,7 @@ def main():
         loglevel=args.loglevel,
     )
     sandbox.unshare(net=args.unshare_net)
-    sandbox.keepenv(
-        "DXVK_CONFIG_FILE",
-        "DXVK_DEBUG",
-        "DXVK_ENABLE_NVAPI",
-        "DXVK_HUD",
-        "DXVK_LOG_LEVEL",
-        "DXVK_LOG_PATH",
-        "DXVK_STATE",
-        "DXVK_STATE_CACHE_PATH",
-        "GAMEMODERUNEXEC",
-        "MANGOHUD",
-        "MANGOHUD_CONFIG",
-        "PROTON_NO_ESYNC",
-        "PROTON_NO_FSYNC",
-        "PROTON_USE_WINED3D",
-        "VKD3D_CONFIG",
-        "VKD3D_FEATURE_LEVEL",
-        "VK_DRIVER_FILES",
-        "VK_INSTANCE_LAYERS",
-        "WINEDLLOVERRIDES",
-        "WINEFSYNC",
-        "WINEDEBUG",
-    )
+    sandbox.keepenv(*KEEP_ENV)
     sandbox.bind_all(
         HOME / "downloads",
         HOME / "tmp",
@@ -121,12 +123,12 @@ def main():
     sandbox.mangohud(enable=args.mangohud)
 
     # bind exe path
-    exe = Path(args.command[0])
-    if not exe.suffix:
-        exe = exe.with_suffix(".exe")
-    logger.info(f"Windows exe is: {exe}")
-    if exe.exists():
-        sandbox.bind(exe.parent.absolute(), mode=BindMode.RW)
+    exe = args.command[0]
+    if not os.path.splitext(exe)[1]:
+        exe += ".exe"
+    logger.info("Windows exe is: %s", exe)
+    if os.path.exists(exe):
+        sandbox.bind(os.path.abspath(os.path.dirname(exe)), mode=BindMode.RW)
 
     # prefer nvidia
     if args.nvidia:
@@ -146,7 +148,11 @@ def main():
         )
 
     if args.bind:
-        handle_binds(args.bind, sandbox.bind)
+        try:
+            binds = parse_binds(args.bind)
+        except ValueError as e:
+            return usage_error(parser.prog, str(e))
+        sandbox.bind_all(*binds)
 
     if args.proton:
         prefix = str(args.prefix or DEFAULT_PROTON_PREFIX)
@@ -169,10 +175,18 @@ def main():
     if args.shell:
         adverb = []
 
-    Path(prefix).mkdir(exist_ok=True)
-    sandbox.dir(prefix)
+    # the prefix is bind mounted, so creating it on the host is enough
+    try:
+        os.mkdir(prefix)
+    except FileExistsError:
+        pass
     sandbox.exec(adverb + args.command)
 
 
+def usage_error(prog: str, message: str) -> int:
+    print(f"{prog}: error: {message}", file=sys.stderr)
+    return 2
+
+
 if __name__ == "__main__":
     sys.exit(main())
@@ -1,10 +1,6 @@
-from .bwrap import (
-    BindMode,
-    Bwrap,
-    BwrapSandbox,
-)
-from .cli import BwrapArgumentParser, BINDMODE_MAP, LOGLEVEL_MAP, handle_binds
-from .path import ensure_path, _PathLike
+import importlib
+
+from .path import ensure_path, ensure_paths, _PathLike
 from .constants import (
     XDG_CACHE_HOME,
     XDG_DATA_HOME,
@@ -14,6 +10,32 @@ from .constants import (
     HOME,
 )
 
+# submodules are imported on first attribute access (PEP 562)
+_LAZY_ATTRS = {
+    "BindMode": ".bwrap",
+    "Bwrap": ".bwrap",
+    "BwrapSandbox": ".bwrap",
+    "BwrapArgumentParser": ".cli",
+    "BINDMODE_MAP": ".cli",
+    "LOGLEVEL_MAP": ".cli",
+    "handle_binds": ".cli",
+    "parse_binds": ".cli",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(__all__)
+
+
 __all__ = [
     "BindMode",
     "Bwrap",
@@ -22,7 +44,9 @@ __all__ = [
     "BINDMODE_MAP",
     "LOGLEVEL_MAP",
     "handle_binds",
+    "parse_binds",
     "ensure_path",
+    "ensure_paths",
     "_PathLike",
     "HOME",
     "XDG_RUNTIME_DIR",
@@ -1,31 +1,140 @@
-from enum import Enum
-from glob import glob
+from dataclasses import dataclass, replace
+from enum import IntEnum
 from pathlib import Path
-from textwrap import dedent
 from typing import Any, Callable, Self, TypedDict, Unpack
 import functools
+import itertools
 import logging
 import os
-import socket
 
 
 from pybwrap._secomp import SECCOMP_BLOCK_TIOCSTI
 from pybwrap.constants import (
-    F_ETC_GROUP,
-    F_ETC_HOSTNAME,
+    DEFAULT_PATH,
     F_ETC_NSSWITCH,
-    F_ETC_PASSWD,
+    GID,
     HOME,
+    UID,
     XDG_CACHE_HOME,
     XDG_RUNTIME_DIR,
+    build_group,
+    build_hosts,
+    build_passwd,
 )
-from pybwrap.path import _PathLike, ensure_path
+from pybwrap.path import _PathLike
+
+_HOME_STR = str(HOME)
+_XDG_RUNTIME_DIR_STR = str(XDG_RUNTIME_DIR)
+
+# read-only binds of the host system
+_HOST_ROOTFS_PATHS = (
+    "/usr",
+    "/opt",
+    "/sys/block",
+    "/sys/bus",
+    "/sys/class",
+    "/sys/dev",
+    "/sys/devices",
+    "/var/empty",
+    "/var/cache/man",
+    "/var/lib/alsa",
+    "/run/systemd/resolve",
+)
+
+_HOST_ROOTFS_SYMLINKS = (
+    "--symlink", "/usr/lib", "/lib",
+    "--symlink", "/usr/lib", "/lib64",
+    "--symlink", "/usr/bin", "/bin",
+    "--symlink", "/usr/bin", "/sbin",
+    "--symlink", "/run", "/var/run",
+)  # fmt: skip
+
+
+@functools.cache
+def _ro_bind_args(paths: tuple[str, ...]) -> tuple[str, ...]:
+    """Flat --ro-bind-try arguments binding each path to itself"""
+    return tuple(arg for path in paths for arg in ("--ro-bind-try", path, path))
+
+
+@functools.cache
+def _present_etc_binds(paths: tuple[str, ...]) -> tuple[str, ...]:
+    """Drop /etc/NAME entries that do not exist on the host
+
+    One scan of /etc replaces a failed stat per missing entry inside bwrap.
+    """
+    try:
+        with os.scandir("/etc") as it:
+            names = {e.name for e in it}
+    except OSError:
+        return paths
+    # only a single /etc/NAME level is checked, anything else is kept as is
+    return tuple(
+        p
+        for p in paths
+        if p[:5] != "/etc/" or not p[5:] or "/" in p[5:] or p[5:] in names
+    )
+
+
+_HOST_ROOTFS_BINDS = _ro_bind_args(_HOST_ROOTFS_PATHS)
+
+
+def _scandir_prefix(dirpath: str, *prefixes: str) -> list[str]:
+    """Paths of the entries in dirpath whose name starts with any of prefixes"""
+    try:
+        with os.scandir(dirpath) as it:
+            return [e.path for e in it if e.name.startswith(prefixes)]
+    except OSError:
+        # missing or unreadable directory, nothing to bind
+        return []
+
+
+@functools.cache
+def _login() -> str:
+    return os.getlogin()
+
+
+@functools.cache
+def _path_env(home: str, entries: tuple[str, ...]) -> str:
+    """PATH value with relative entries anchored at home"""
+    return ":".join([p if p[:1] == "/" else f"{home}/{p}" for p in entries])
+
+
+def _normpath(path: str) -> str:
+    """Drop empty and "." components and any trailing slash, as pathlib does"""
+    if path == "/" or not ("//" in path or "/./" in path or path.endswith(("/", "/."))):
+        return path
+    parts = "/".join([p for p in path.split("/") if p and p != "."])
+    return f"/{parts}" if path[:1] == "/" else parts or "."
+
+
+@functools.cache
+def _bwrap_bin() -> str:
+    import shutil
+
+    path = shutil.which("bwrap")
+    if path is None:
+        raise RuntimeError("bwrap not found in PATH")
+    return path
+
 
+# largest write guaranteed to fit in an empty pipe
+_PIPE_BUF = 4096
 
-class BindMode(Enum):
-    RW = "rw"
-    RO = "ro"
-    DEV = "dev"
+
+def _write_all(fd: int, data: bytes):
+    written = os.write(fd, data)
+    while written < len(data):
+        written += os.write(fd, data[written:])
+
+
+class BindMode(IntEnum):
+    RW = 0
+    RO = 1
+    DEV = 2
+
+
+# indexed by BindMode
+_BIND_FLAG = ("--bind-try", "--ro-bind-try", "--dev-bind-try")
 
 
 class BindOpts(TypedDict):
@@ -40,21 +149,25 @@ class BindSpec(BindOpts):
     dest: _PathLike | None
 
 
+@dataclass(slots=True, frozen=True)
+class _BindArgs:
+    """Parsed BindOpts"""
+
+    mode: BindMode = BindMode.RO
+    asis: bool = False
+    src_anchor: _PathLike | None = None
+    dest_anchor: _PathLike | None = None
+
+
+_DEFAULT_BIND_ARGS = _BindArgs()
+
+
 class Bwrap:
-    DEFAULT_PATH = (
-        ".local/bin",
-        "go/bin",
-        "/usr/local/bin",
-        "/usr/local/sbin",
-        "/usr/bin",
-        "/usr/sbin",
-        "/bin",
-        "/sbin",
-    )
+    DEFAULT_PATH = DEFAULT_PATH
 
     class Options(TypedDict):
         user: str
-        hostname: str
+        hostname: str | None
         keep_user: bool
         keep_hostname: bool
         profile: str | None
@@ -67,7 +180,7 @@ class Bwrap:
 
     DEFAULT_OPTIONS: Options = {
         "user": "user",
-        "hostname": f"sandbox-{os.getpid()}",
+        "hostname": None,
         "keep_user": False,
         "keep_hostname": False,
         "profile": None,
@@ -76,29 +189,33 @@ class Bwrap:
         "path": DEFAULT_PATH,
         "keep_child": False,
         "rootfs": None,
-        "loglevel": logging.DEBUG,
+        "loglevel": logging.ERROR,
     }
 
     def __init__(self, **kwargs: Unpack[Options]):
-        opts = self.DEFAULT_OPTIONS | kwargs
+        opts = self.DEFAULT_OPTIONS | kwargs if kwargs else self.DEFAULT_OPTIONS
         self.logger = logging.getLogger("bwrap")
-        self.logger.setLevel(kwargs.get("loglevel", logging.ERROR))
+        self.logger.setLevel(opts["loglevel"])
 
         self.etc_binds = opts["etc_binds"]
         self.user = opts["user"]
-        self.hostname = opts["hostname"]
+        self.hostname = opts["hostname"] or f"sandbox-{os.getpid()}"
         if opts["keep_user"]:
-            self.user = os.getlogin()
+            self.user = _login()
         if opts["keep_hostname"]:
+            import socket
+
             self.hostname = socket.gethostname()
 
         self.home = Path("/home") / self.user
-        self.logger.info(f"container HOME: {self.home}")
+        self._home_str = str(self.home)
+        self.logger.info("container HOME: %s", self.home)
 
         # Adjusts the host's current working directory (CWD) for the container.
-        self.host_cwd = Path.cwd()
+        self._host_cwd_str = os.getcwd()
+        self.host_cwd = Path(self._host_cwd_str)
         self.cwd = self.resolve_path(self.host_cwd)
-        self.logger.info(f"container CWD: {self.cwd}")
+        self.logger.info("container CWD: %s", self.cwd)
 
         profile = opts["profile"]
         self.profile: Path | None = Path(profile) if profile else None
@@ -111,6 +228,13 @@ class Bwrap:
     def _init_container(self, opts: Options):
         """Base system"""
         rootfs = opts["rootfs"]
+        if rootfs is not None:
+            self.logger.info("Using %s as rootfs", rootfs)
+            # TODO: bind rootfs
+            raise NotImplementedError()
+
+        self.logger.info("Using host rootfs")
+        etc_binds = _present_etc_binds(tuple(self.etc_binds or ("/etc",)))
         self.args: list[str] = [
             "--tmpfs", "/tmp",
             "--proc", "/proc",
@@ -119,63 +243,36 @@ class Bwrap:
             "--dir", "/var",
             "--dir", "/run",
             "--unsetenv", "TMUX",
-            "--seccomp", str(self.openfd(SECCOMP_BLOCK_TIOCSTI)),
+            *_HOST_ROOTFS_BINDS,
+            *_ro_bind_args(etc_binds),
+            "--dev-bind-try", "/dev/fuse", "/dev/fuse",
+            *_HOST_ROOTFS_SYMLINKS,
         ]  # fmt: skip
 
-        if rootfs is None:
-            self.logger.info("Using host rootfs")
-            binds = (
-                "/usr",
-                "/opt",
-                "/sys/block",
-                "/sys/bus",
-                "/sys/class",
-                "/sys/dev",
-                "/sys/devices",
-                "/var/empty",
-                "/var/cache/man",
-                "/var/lib/alsa",
-                "/run/systemd/resolve",
-            ) + (self.etc_binds or ("/etc",))
-            for v in binds:
-                self.args.extend(("--ro-bind-try", v, v))
-            self.bind("/dev/fuse", mode=BindMode.DEV)
-
-            self.symlink(
-                ("/usr/lib", "/lib"),
-                ("/usr/lib", "/lib64"),
-                ("/usr/bin", "/bin"),
-                ("/usr/bin", "/sbin"),
-                ("/run", "/var/run"),
-            )
-        else:
-            self.logger.info(f"Using {rootfs} as rootfs")
-            # TODO: bind rootfs
-            raise NotImplementedError()
-
         if not opts["keep_child"]:
             self.logger.info("Container will be killed when bwrap terminates")
             self.args.append("--die-with-parent")
 
     def _init_home(self, opts: Options):
-        self.xdg_runtime_dir = Path(f"/run/user/{os.getuid()}")
-        self.xdg_config_home = self.home / ".config"
-        self.xdg_cache_home = self.home / ".cache"
-        self.xdg_data_home = self.home / ".local" / "share"
-        self.xdg_state_home = self.home / ".local" / "state"
+        h = self._home_str
+        self.xdg_runtime_dir = f"/run/user/{UID}"
+        self.xdg_config_home = f"{h}/.config"
+        self.xdg_cache_home = f"{h}/.cache"
+        self.xdg_data_home = f"{h}/.local/share"
+        self.xdg_state_home = f"{h}/.local/state"
 
         if self.profile:
-            self.logger.info(f"using host {self.profile} as container home directory")
-            self.args.extend(("--bind", str(self.profile), str(self.home)))
+            self.logger.info("using host %s as container home directory", self.profile)
+            self.args.extend(("--bind", str(self.profile), self._home_str))
 
         self.dir(
-            self.home,
+            h,
             self.xdg_runtime_dir,
             self.xdg_cache_home,
             self.xdg_config_home,
             self.xdg_data_home,
             self.xdg_state_home,
-            self.home / ".local" / "bin",
+            f"{h}/.local/bin",
         )
 
         self.bind_all(
@@ -183,20 +280,36 @@ class Bwrap:
             HOME / ".config/user-dirs.locale",
         )
 
+    _KEEPENV_VARS = (
+        "COLORTERM",
+        "EDITOR",
+        "LANG",
+        "LC_ALL",
+        "LC_TIME",
+        "NO_AT_BRIDGE",
+        "PAGER",
+        "SHELL",
+        "TERM",
+        "WINEDEBUG",
+        "WINEFSYNC",
+        "XDG_BACKEND",
+        "XDG_SEAT",
+        "XDG_SESSION_CLASS",
+        "XDG_SESSION_ID",
+        "XDG_SESSION_TYPE",
+    )
+
     def _init_environment_variables(self, opts: Options):
         if opts["clearenv"]:
             self.logger.info("Environment variables cleared")
             self.clearenv()
 
-        path = (
-            p if Path(p).is_absolute() else str(self.home / p)
-            for p in opts["path"] or self.DEFAULT_PATH
-        )
+        path = _path_env(self._home_str, tuple(opts["path"] or self.DEFAULT_PATH))
 
         self.setenv(
-            HOME=self.home,
+            HOME=self._home_str,
             SANDBOX=1,
-            PATH=str.join(":", path),
+            PATH=path,
             LOGNAME=self.user,
             USER=self.user,
             HOSTNAME=self.hostname,
@@ -207,66 +320,40 @@ class Bwrap:
             XDG_STATE_HOME=self.xdg_state_home,
             GTK_A11Y="none",
         )
-        self.logger.info(f"set PATH to {path}")
+        self.logger.info("set PATH to %s", path)
 
         # inherit from parent process
-        self.keepenv(
-            "COLORTERM",
-            "EDITOR",
-            "LANG",
-            "LC_ALL",
-            "LC_TIME",
-            "NO_AT_BRIDGE",
-            "PAGER",
-            "SHELL",
-            "TERM",
-            "WINEDEBUG",
-            "WINEFSYNC",
-            "XDG_BACKEND",
-            "XDG_SEAT",
-            "XDG_SESSION_CLASS",
-            "XDG_SESSION_ID",
-            "XDG_SESSION_TYPE",
-        )
+        self.keepenv(*self._KEEPENV_VARS)
 
     def _init_system_id(self, opts: Options):
         """Initialize system identity, such as hostname and user name"""
         if not opts["keep_hostname"]:
-            self.logger.info(f"Hostname changed to {self.hostname}")
+            self.logger.info("Hostname changed to %s", self.hostname)
             self.args.extend([
                 "--unshare-uts",
                 "--hostname", self.hostname
             ])  # fmt: skip
 
-        self.logger.info(f"User name changed to {self.user}")
-        uid, gid = os.getuid(), os.getgid()
+        self.logger.info("User name changed to %s", self.user)
+        uid, gid = UID, GID
 
         cp = self.bind_data
+        cp_all = self._bind_data_multi
         cp(F_ETC_NSSWITCH, "/etc/nsswitch.conf")
-        passwd_f = F_ETC_PASSWD.format(user=self.user, uid=uid, gid=gid, home=self.home)
-        group_f = F_ETC_GROUP.format(user=self.user, gid=gid)
+        passwd_f = build_passwd(self.user, uid, gid, self._home_str)
+        group_f = build_group(self.user, gid)
         subuid_f = f"{self.user}:100000:65536\n"
-        cp(passwd_f, "/etc/passwd")
-        cp(passwd_f, "/etc/passwd.OLD")
-        cp(passwd_f, "/etc/passwd-")
-        cp(group_f, "/etc/group")
-        cp(group_f, "/etc/group-")
-        cp(F_ETC_HOSTNAME.format(hostname=self.hostname), "/etc/hosts")
+        cp_all(passwd_f, "/etc/passwd", "/etc/passwd.OLD", "/etc/passwd-")
+        cp_all(group_f, "/etc/group", "/etc/group-")
+        cp(build_hosts(self.hostname), "/etc/hosts")
         cp(f"{self.hostname}\n", "/etc/hostname")
-        cp(subuid_f, "/etc/subuid")
-        cp(subuid_f, "/etc/subuid-")
-        cp(subuid_f, "/etc/subgid")
-        cp(subuid_f, "/etc/subgid-")
+        cp_all(subuid_f, "/etc/subuid", "/etc/subuid-", "/etc/subgid", "/etc/subgid-")
         cp(b"", "/etc/fstab")
 
     @staticmethod
     def format_bind_args(src: _PathLike, dest: _PathLike, mode):
         """Format bind arguments based on binding mode"""
-        return {
-            BindMode.RW: ("--bind-try", str(src), str(dest)),
-            BindMode.RO: ("--ro-bind-try", str(src), str(dest)),
-            BindMode.DEV: ("--dev-bind-try", str(src), str(dest)),
-        }[mode]
+        return (_BIND_FLAG[mode], str(src), str(dest))
 
     def resolve_path(
         self,
@@ -292,22 +379,21 @@ class Bwrap:
         """
         if path is None:
             return None
-
-        path = ensure_path(path)
-        if not path.is_absolute():
-            path = (anchor or self.host_cwd) / path
-
-        try:
-            return self.home / path.relative_to(HOME) if translate else path
-        except ValueError:
-            return path
-
-    BIND_OPTIONS = {
-        "mode": BindMode.RO,
-        "asis": False,
-        "src_anchor": None,
-        "dest_anchor": None,
-    }
+        return Path(self._resolve(path, translate, anchor))
+
+    def _resolve(self, path: _PathLike, translate=True, anchor=None) -> str:
+        """String-only implementation of resolve_path"""
+        path = os.fspath(path)
+        if path[:1] != "/":
+            base = os.fspath(anchor) if anchor else self._host_cwd_str
+            path = f"{base.rstrip('/')}/{path}" if path else base
+        path = _normpath(path)
+
+        if translate and path.startswith(_HOME_STR):
+            rest = path[len(_HOME_STR) :]
+            if not rest or rest[0] == "/":
+                return self._home_str + rest
+        return path
 
     def bind(
         self,
@@ -329,22 +415,25 @@ class Bwrap:
             dest_anchor (Path): against where relative dest resolves
             src_anchor (Path): against where relative dest resolves
         """
-        opts: BindOpts = self.BIND_OPTIONS | kwargs
-        src, dest = ensure_path(src, dest or src)
+        self._bind(src, dest, _BindArgs(**kwargs) if kwargs else _DEFAULT_BIND_ARGS)
+
+    def _bind(self, src: _PathLike, dest: _PathLike | None, opts: _BindArgs):
+        self.args.extend(self._bind_args(src, dest, opts))
+
+    def _bind_args(self, src: _PathLike, dest: _PathLike | None, opts: _BindArgs):
+        if dest is None and type(src) is str and src[:1] == "/":
+            src = _normpath(src)
+            if not src.startswith(_HOME_STR):
+                # absolute and outside HOME: resolves to itself on both ends
+                return (_BIND_FLAG[opts.mode], src, src)
+
+        dest = dest or src
 
         # resolve relative path
-        src = self.resolve_path(
-            src,
-            translate=False,
-            anchor=opts["src_anchor"],
-        )
-        dest = self.resolve_path(
-            dest,
-            translate=not opts["asis"],
-            anchor=opts["dest_anchor"],
-        )
+        src = self._resolve(src, translate=False, anchor=opts.src_anchor)
+        dest = self._resolve(dest, translate=not opts.asis, anchor=opts.dest_anchor)
 
-        self.args.extend(self.format_bind_args(str(src), str(dest), opts["mode"]))
+        return (_BIND_FLAG[opts.mode], src, dest)
 
     def bind_all(
         self,
@@ -362,35 +451,57 @@ class Bwrap:
             dest_anchor (Path): against where relative dest resolves
             src_anchor (Path): against where relative dest resolves
         """
-        opts = self.BIND_OPTIONS | kwargs
+        default = _BindArgs(**kwargs) if kwargs else _DEFAULT_BIND_ARGS
 
+        args = []
         for bind in binds:
             if isinstance(bind, dict):
-                self.bind(**(opts | bind))
+                spec = dict(bind)
+                src = spec.pop("src")
+                dest = spec.pop("dest", None)
+                opts = replace(default, **spec) if spec else default
+                args += self._bind_args(src, dest, opts)
             else:
-                self.bind(bind, **opts)
+                args += self._bind_args(bind, None, default)
+        self.args += args
 
     def symlink(self, *symlink_spec: tuple[_PathLike]):
-        for src, dest in symlink_spec:
-            src, dest = self.resolve_path(src), self.resolve_path(dest)
-            self.args.extend(["--symlink", str(src), str(dest)])
+        resolve = self._resolve
+        self.args.extend([
+            arg
+            for src, dest in symlink_spec
+            for arg in ("--symlink", resolve(src), resolve(dest))
+        ])  # fmt: skip
 
     def dir(self, *dirs: _PathLike):
-        for dir in dirs:
-            self.args.extend(("--dir", str(self.resolve_path(dir))))
+        resolve = self._resolve
+        self.args.extend([arg for dir in dirs for arg in ("--dir", resolve(dir))])
 
     def tmpfs(self, *paths: _PathLike):
-        for fs in paths:
-            self.args.extend(("--tmpfs", str(self.resolve_path(fs))))
+        resolve = self._resolve
+        self.args.extend([arg for fs in paths for arg in ("--tmpfs", resolve(fs))])
 
     @staticmethod
     def openfd(content: str | bytes) -> int:
         """Get file descriptor of content"""
-        r, w = os.pipe()
-        os.set_inheritable(r, True)
         if isinstance(content, str):
             content = content.encode()
-        os.write(w, content)
+
+        if len(content) > _PIPE_BUF:
+            # nothing drains the pipe before bwrap starts, so a write larger
+            # than the pipe buffer would block forever
+            fd = os.memfd_create("bwrap-data", 0)
+            _write_all(fd, content)
+            os.lseek(fd, 0, os.SEEK_SET)
+            return fd
+
+        # created without O_CLOEXEC so that bwrap inherits the read end
+        r, w = os.pipe2(0)
+        try:
+            _write_all(w, content)
+        finally:
+            # bwrap reads until EOF, which only comes once every writer is closed
+            os.close(w)
         return r
 
     class _FileArgs(TypedDict):
@@ -399,7 +510,7 @@ class Bwrap:
         asis: bool
 
     def openfd_at(self, content: str | bytes, dest, **kwargs: Unpack[_FileArgs]) -> int:
-        dest = self.resolve_path(
+        dest = self._resolve(
             dest,
             anchor=kwargs.get("anchor"),
             translate=not kwargs.get("asis", False),
@@ -425,7 +536,7 @@ class Bwrap:
             perms (_type_, optional): Permission. Defaults to 0666
         """
         fd, dest = self.openfd_at(content, dest, **opts)
-        self.args.extend(("--file", str(fd), str(dest)))
+        self.args.extend(("--file", str(fd), dest))
 
     def bind_data(
         self,
@@ -438,30 +549,44 @@ class Bwrap:
         fd, dest = self.openfd_at(content, dest, **opts)
 
         if mode == BindMode.RO:
-            self.args.extend(("--ro-bind-data", str(fd), str(dest)))
+            self.args.extend(("--ro-bind-data", str(fd), dest))
         elif mode == BindMode.RW:
-            self.args.extend(("--bind-data", str(fd), str(dest)))
+            self.args.extend(("--bind-data", str(fd), dest))
+
+    def _bind_data_multi(self, content: str | bytes, *dests: _PathLike):
+        """Bind the same data to several paths in container
+
+        bwrap consumes each data fd once, so every destination still needs its
+        own pipe, but the content is only encoded once.
+        """
+        if isinstance(content, str):
+            content = content.encode()
+        for dest in dests:
+            self.bind_data(content, dest)
 
     def setenv(self, **kwargs: Any):
-        for var, value in kwargs.items():
-            if value is None or var == "LC_ALL":
-                continue
-            self.args.extend(("--setenv", var, str(value)))
+        self.args.extend([
+            arg
+            for var, value in kwargs.items()
+            if value is not None and var != "LC_ALL"
+            for arg in ("--setenv", var, str(value))
+        ])  # fmt: skip
 
     def unsetenv(self, *vars: str):
-        for var in vars:
-            self.args.extend(("--unsetenv", var))
+        self.args.extend([arg for var in vars for arg in ("--unsetenv", var)])
 
     def clearenv(self):
         self.args.append("--clearenv")
 
     def keepenv(self, *vars: str):
         """Inherit environment variables from host"""
-        for var in vars:
-            value = os.getenv(var)
-            if value is None:
-                continue
-            self.args.extend(("--setenv", var, value))
+        env = os.environ
+        self.args.extend([
+            arg
+            for var in vars
+            if (value := env.get(var)) is not None
+            for arg in ("--setenv", var, value)
+        ])  # fmt: skip
 
     def unshare(self, net=False):
         self.args.append("--unshare-all")
@@ -476,54 +601,92 @@ class Bwrap:
 
     def exec(self, command: list[str]):
         """Start bwrap container with commands"""
+        bwrap = _bwrap_bin()
 
-        # fix paths in command
-        host_home = str(HOME)
+        # fix paths in command, including --flag=/path style arguments
+        home = self._home_str
+        n = len(_HOME_STR)
         for i, v in enumerate(command):
-            if v[0] == "/" and host_home in v:
-                command[i] = str(self.resolve_path(v))
+            if v[:2] == "--" and "=" in v:
+                flag, sep, v = v.partition("=")
+            else:
+                flag = sep = ""
+            if v.startswith(_HOME_STR) and v[n : n + 1] in ("", "/"):
+                command[i] = f"{flag}{sep}{home}{v[n:]}"
 
         self._debug_print_args(command)
 
+        # the filter fd is only opened once the container is about to start
+        args = ["--seccomp", str(self.openfd(SECCOMP_BLOCK_TIOCSTI))] + self.args
+
         # launch the container
-        os.execvp(
-            "bwrap",
-            ["bwrap", "--args", str(self.openfd("\0".join(self.args)))] + command,
+        os.execv(
+            bwrap,
+            ("bwrap", "--args", str(self.openfd("\0".join(args))), *command),
         )
 
     def _debug_print_args(self, command):
-        if self.logger.level <= logging.DEBUG:
-            args = self.args
-            indices = [i for i, x in enumerate(args) if x.startswith("--")]
-            for a in (
-                " ".join(args[i:j]) for i, j in zip(indices, indices[1:] + [len(args)])
-            ):
-                self.logger.debug(f"arg: {a}")
-            self.logger.debug(f"arg: {command}")
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        lines = []
+        group = []
+        for arg in self.args:
+            if arg.startswith("--") and group:
+                lines.append(f"arg: {' '.join(group)}")
+                group = []
+            group.append(arg)
+        if group:
+            lines.append(f"arg: {' '.join(group)}")
+        lines.append(f"arg: {command}")
+        self.logger.debug("\n".join(lines))
+
+
+# bit assigned to each sandbox feature, by method name
+# one bit per decorated function, so an override and the method it extends
+# through super() are tracked separately
+_feature_count = itertools.count()
 
 
 class BwrapSandbox(Bwrap):
     def __init__(self, *args, **kwargs: Unpack[Bwrap.Options]):
         super().__init__(*args, **kwargs)
-        self._enabled_features = set()
+        self._enabled_features = 0
 
     def feature(depends: tuple[str] = ()):
         def decorator(func: Callable):
-            @functools.wraps(func)
+            name = func.__name__
+            flag = 1 << next(_feature_count)
+            # dependency methods and their bits, looked up once per sandbox class
+            resolved: dict[type, tuple] = {}
+
             def wrapper(self: Self, *args, **kwargs):
-                if func in self._enabled_features:
-                    self.logger.info(
-                        f"feature {func.__name__} is already enabled, skipping"
-                    )
+                enabled = self._enabled_features
+                if enabled & flag:
+                    self.logger.info("feature %s is already enabled, skipping", name)
                     return
-                self._enabled_features.add(func)
-
-                for dep in depends:
-                    getattr(self, dep)()
+                self._enabled_features = enabled | flag
+
+                cls = type(self)
+                methods = resolved.get(cls)
+                if methods is None:
+                    methods = tuple(
+                        (getattr(method, "_feature_bit", 0), method)
+                        for method in (getattr(cls, dep) for dep in depends)
+                    )
+                    resolved[cls] = methods
+                for bit, method in methods:
+                    if not self._enabled_features & bit:
+                        method(self)
 
-                self.logger.info(f"enabled {func.__name__}")
+                self.logger.info("enabled %s", name)
                 return func(self, *args, **kwargs)
 
+            wrapper.__name__ = name
+            wrapper.__qualname__ = func.__qualname__
+            wrapper.__doc__ = func.__doc__
+            wrapper.__module__ = func.__module__
+            wrapper.__wrapped__ = func
+            wrapper._feature_bit = flag
             return wrapper
 
         return decorator
@@ -542,8 +705,8 @@ class BwrapSandbox(Bwrap):
         self.bind_all(
             "/tmp/.X11-unix",
             "/tmp/.ICE-unix",
-            self.home / ".Xauthority",
-            *glob(str(XDG_RUNTIME_DIR / "ICE*")),
+            f"{self._home_str}/.Xauthority",
+            *_scandir_prefix(_XDG_RUNTIME_DIR_STR, "ICE"),
             mode=BindMode.RW,
         )
         self.keepenv("DISPLAY", "XAUTHORITY")
@@ -551,7 +714,7 @@ class BwrapSandbox(Bwrap):
     @feature(depends=("gpu",))
     def wayland(self):
         self.bind_all(
-            *glob(str(XDG_RUNTIME_DIR / "wayland*")),
+            *_scandir_prefix(_XDG_RUNTIME_DIR_STR, "wayland"),
             mode=BindMode.RW,
         )
         self.setenv(
@@ -565,8 +728,7 @@ class BwrapSandbox(Bwrap):
     @feature()
     def audio(self):
         self.bind_all(
-            *glob(str(XDG_RUNTIME_DIR / "pulse*")),
-            *glob(str(XDG_RUNTIME_DIR / "pipewire*")),
+            *_scandir_prefix(_XDG_RUNTIME_DIR_STR, "pulse", "pipewire"),
             {"src": "/dev/snd", "mode": BindMode.DEV},
             mode=BindMode.RW,
         )
@@ -575,7 +737,7 @@ class BwrapSandbox(Bwrap):
     def gpu(self, shader_cache=True):
         self.bind_all(
             "/dev/dri",
-            *glob("/dev/nvidia*"),
+            *_scandir_prefix("/dev", "nvidia"),
             mode=BindMode.DEV,
         )
         self.keepenv("__GL_THREADED_OPTIMIZATION")
@@ -615,11 +777,9 @@ class BwrapSandbox(Bwrap):
 
     @feature()
     def locale(self, newlocale):
-        self.logger.info(f"set new locale to {newlocale}")
+        self.logger.info("set new locale to %s", newlocale)
         self.setenv(
             LANG=newlocale,
             LC_ALL=newlocale,
         )
-        self.bind_data(
-            dedent(f"LANG={newlocale}\nLC_TIME={newlocale}"), "/etc/locale.conf"
-        )
+        self.bind_data(f"LANG={newlocale}\nLC_TIME={newlocale}", "/etc/locale.conf")
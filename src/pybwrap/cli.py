@@ -1,14 +1,14 @@
 import argparse
 import logging
 import os
-import re
+import sys
 from pathlib import Path
 from typing import Callable
 
 
-from pybwrap.constants import ETC_WHITELIST
+from pybwrap.constants import ETC_WHITELIST, HOME
 
-from . import BwrapSandbox, BindMode
+from .bwrap import BwrapSandbox, BindMode, BindSpec
 
 BINDMODE_MAP = {
     "r": BindMode.RO,
@@ -24,16 +24,30 @@ LOGLEVEL_MAP = {
 }
 
 
-bind_spec = re.compile(r"^(?P<src>[^:]+)(?::(?P<dest>[^:]*))?(?::(?P<mode>[rwd]))?$")
+def parse_binds(binds: list[str]) -> list[BindSpec]:
+    """Parse SRC[:DEST[:MODE]] bind specs into specs for bind_all()"""
+    specs = []
+    for bind in binds:
+        parts = bind.split(":", 2)
+        if not parts[0]:
+            raise ValueError(f"missing bind source in {bind!r}")
+        mode = BINDMODE_MAP.get(parts[2] if len(parts) > 2 else "r")
+        if mode is None:
+            raise ValueError(f"invalid bind mode in {bind!r}, expected r, w or d")
+        specs.append({
+            "src": parts[0],
+            "dest": parts[1] if len(parts) > 1 and parts[1] else None,
+            "mode": mode,
+        })  # fmt: skip
+    return specs
 
 
 def handle_binds(binds: list[str], callback: Callable):
-    for bind in binds:
-        m = bind_spec.match(bind)
-        src = Path(m.group("src"))
-        dest = Path(m.group("dest") or src)
-        mode = BINDMODE_MAP[m.group("mode") or "r"]
-        callback(src, dest, mode=mode)
+    """Parse SRC[:DEST[:MODE]] bind specs and pass each to callback"""
+    for spec in parse_binds(binds):
+        src = Path(spec["src"])
+        dest = Path(spec["dest"]) if spec["dest"] else src
+        callback(src, dest, mode=spec["mode"])
 
 
 class BwrapArgs(argparse.Namespace):
@@ -102,15 +116,23 @@ class BwrapArgumentParser(argparse.ArgumentParser):
         )
         self.default_cmd = default_cmd
 
-    def parse_args(self, *args, **kwargs) -> BwrapArgs:
-        args: BwrapArgs = super().parse_args(*args, **kwargs)
-
-        if len(args.command) == 0:
-            if self.default_cmd:
-                args.command = self.default_cmd
+    def parse_args(self, args=None, namespace=None) -> BwrapArgs:
+        argv = sys.argv[1:] if args is None else list(args)
+        # everything after the first "--" is the command, never our flags
+        try:
+            i = argv.index("--")
+        except ValueError:
+            rest = None
         else:
-            if args.command[0] == "--":
-                args.command.pop(0)
+            argv, rest = argv[:i], argv[i + 1 :]
+
+        args: BwrapArgs = super().parse_args(argv, namespace)
+
+        if rest is not None:
+            # keep "--" when it came after the start of the command
+            args.command = args.command + ["--"] + rest if args.command else rest
+        if len(args.command) == 0 and self.default_cmd:
+            args.command = self.default_cmd
 
         args.loglevel = LOGLEVEL_MAP.get(getattr(args, "loglevel"), logging.ERROR)
 
@@ -191,8 +213,7 @@ class BwrapArgumentParser(argparse.ArgumentParser):
             "-t",
             "--hostname",
             type=str,
-            help="Change hostname to <hostname>.",
-            default=f"sandbox-{os.getpid()}",
+            help="Change hostname to <hostname>. Defaults to sandbox-<pid>.",
         )
 
     def add_flag_bind(self):
@@ -243,14 +264,11 @@ class BwrapArgumentParser(argparse.ArgumentParser):
         )
 
 
-def main():
-    HOME = Path.home()
+# flags that enable the sandbox feature of the same name, in mount order
+_SIMPLE_FLAGS = ("dbus", "x11", "wayland", "audio", "gpu", "nvidia")
 
-    logging.basicConfig(
-        level=logging.ERROR,
-        format="%(levelname)s:%(name)s: %(message)s",
-    )
 
+def main():
     parser = BwrapArgumentParser(
         description="Create new bubblewrap container",
         enable_all_flags=True,
@@ -259,6 +277,13 @@ def main():
 
     args = parser.parse_args()
 
+    # at the default level, logging's last resort handler is enough
+    if args.loglevel < logging.ERROR:
+        logging.basicConfig(
+            level=logging.ERROR,
+            format="%(levelname)s:%(name)s: %(message)s",
+        )
+
     if len(args.command) == 0:
         parser.error("a command is required")
 
@@ -273,21 +298,13 @@ def main():
         etc_binds=ETC_WHITELIST if args.etc else None,
     )
     sandbox.unshare(net=args.unshare_net)
-    if args.dbus:
-        sandbox.dbus()
-    if args.x11:
-        sandbox.x11()
-    if args.wayland:
-        sandbox.wayland()
-    if args.audio:
-        sandbox.audio()
-    if args.gpu:
-        sandbox.gpu()
-    if args.nvidia:
-        sandbox.nvidia()
+    for name in _SIMPLE_FLAGS:
+        if getattr(args, name):
+            getattr(sandbox, name)()
     if args.cwd:
         sandbox.bind(os.getcwd(), mode=BindMode.RW)
         sandbox.chdir()
+    # kept after cwd, bwrap applies mounts in argv order
     if args.desktop:
         sandbox.desktop()
     if args.locale is not None:
@@ -300,5 +317,9 @@ def main():
         mode=BindMode.RW,
     )
     if args.bind:
-        handle_binds(args.bind, sandbox.bind)
+        try:
+            binds = parse_binds(args.bind)
+        except ValueError as e:
+            parser.error(str(e))
+        sandbox.bind_all(*binds)
     sandbox.exec(args.command)
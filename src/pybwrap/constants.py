@@ -1,13 +1,16 @@
+import functools
 import os
 from pathlib import Path
 
 
 def _xdg_path(var_name: str, fallback: Path) -> Path:
-    return Path(os.getenv(var_name, fallback)).expanduser().resolve()
+    return Path(os.getenv(var_name) or fallback).expanduser()
 
 
+UID = os.getuid()
+GID = os.getgid()
 HOME = Path.home()
-XDG_RUNTIME_DIR = _xdg_path("XDG_RUNTIME_DIR", "/run/user/" + str(os.getuid()))
+XDG_RUNTIME_DIR = _xdg_path("XDG_RUNTIME_DIR", f"/run/user/{UID}")
 XDG_CONFIG_HOME = _xdg_path("XDG_CONFIG_HOME", HOME / ".config")
 XDG_CACHE_HOME = _xdg_path("XDG_CACHE_HOME", HOME / ".cache")
 XDG_DATA_HOME = _xdg_path("XDG_DATA_HOME", HOME / ".local" / "share")
@@ -15,23 +18,37 @@ XDG_STATE_HOME = _xdg_path("XDG_STATE_HOME", HOME / ".local" / "state")
 
 SHELL = os.getenv("SHELL", "/usr/bin/bash")
 
-F_ETC_PASSWD = f"""\
+DEFAULT_PATH = (
+    ".local/bin",
+    "go/bin",
+    "/usr/local/bin",
+    "/usr/local/sbin",
+    "/usr/bin",
+    "/usr/sbin",
+    "/bin",
+    "/sbin",
+)
+
+# fixed leading lines of the templates below, and the per-sandbox tail lines
+ETC_PASSWD_PREFIX = """\
 root:x:0:0::/root:/usr/bin/bash
 bin:x:1:1::/:/usr/bin/nologin
 daemon:x:2:2::/:/usr/bin/nologin
 nobody:x:65534:65534:Kernel Overflow User:/:/usr/bin/nologin
-{{user}}:x:{{uid}}:{{gid}}::{{home}}:{SHELL}
 """
+ETC_PASSWD_USER_LINE = f"{{user}}:x:{{uid}}:{{gid}}::{{home}}:{SHELL}\n"
+F_ETC_PASSWD = ETC_PASSWD_PREFIX + ETC_PASSWD_USER_LINE
 
-F_ETC_GROUP = """
+ETC_GROUP_PREFIX = """
 root:x:0:root
 bin:x:1:daemon
 nobody:x:65534:
 daemon:x:2:bin
-{user}:x:{gid}:
 """
+ETC_GROUP_USER_LINE = "{user}:x:{gid}:\n"
+F_ETC_GROUP = ETC_GROUP_PREFIX + ETC_GROUP_USER_LINE
 
-F_ETC_NSSWITCH = """
+F_ETC_NSSWITCH = b"""
 passwd: files
 group: files [SUCCESS=merge] systemd
 shadow: files
@@ -46,13 +63,34 @@ rpc: files
 netgroup: files
 """
 
-F_ETC_HOSTNAME = """
+ETC_HOSTS_PREFIX = """
 127.0.0.1       localhost       localhost.localdomain
 ::1             localhost       localhost.localdomain
+"""
+ETC_HOSTS_HOST_LINES = """\
 127.0.0.1       {hostname}      {hostname}.localdomain
 ::1             {hostname}      {hostname}.localdomain
 127.0.0.1       {hostname}.local
 """
+F_ETC_HOSTNAME = ETC_HOSTS_PREFIX + ETC_HOSTS_HOST_LINES
+
+
+@functools.lru_cache(maxsize=32)
+def build_passwd(user: str, uid: int, gid: int, home: str) -> bytes:
+    line = ETC_PASSWD_USER_LINE.format(user=user, uid=uid, gid=gid, home=home)
+    return (ETC_PASSWD_PREFIX + line).encode()
+
+
+@functools.lru_cache(maxsize=32)
+def build_group(user: str, gid: int) -> bytes:
+    return (ETC_GROUP_PREFIX + ETC_GROUP_USER_LINE.format(user=user, gid=gid)).encode()
+
+
+@functools.lru_cache(maxsize=32)
+def build_hosts(hostname: str) -> bytes:
+    lines = ETC_HOSTS_HOST_LINES.format(hostname=hostname)
+    return (ETC_HOSTS_PREFIX + lines).encode()
+
 
 ETC_WHITELIST = (
     "/etc/alsa",
@@ -1,96 +1,126 @@
+import copy
+import inspect
+import os
 import unittest
-from unittest.mock import patch
+from unittest.mock import MagicMock, Mock, patch
 from pathlib import Path
 
 
-from pybwrap import Bwrap, BindMode, HOME
+from pybwrap import Bwrap, BwrapSandbox, BindMode, HOME
+from pybwrap.bwrap import _present_etc_binds
 
+HOST_HOME = Path.home()
+HOST_HOME_STR = str(HOST_HOME)
+HOST_HOME_CACHE = f"{HOST_HOME_STR}/.cache"
 
-class TestBwrap(unittest.TestCase):
-    def __init__(self, *args, **kwargs) -> None:
-        super().__init__(*args, **kwargs)
-        self.cwd = Path.cwd()
+EXPECTED_SYMLINK_ARGS = (
+    "--symlink",
+    "/usr/lib",
+    "/lib",
+    "--symlink",
+    "/usr/bin",
+    "/bin",
+)
+EXPECTED_UNSETENV_ARGS = ("--unsetenv", "VAR1", "--unsetenv", "VAR2")
+EXPECTED_KEEPENV_ARGS = ("--setenv", "VAR1", "1", "--setenv", "VAR3", "3")
+EXPECTED_BIND_ALL_ANCHOR_HOME_ARGS = (
+    "--ro-bind-try",
+    HOST_HOME_CACHE,
+    "/home/testuser/host_cache",
+    "--ro-bind-try",
+    f"{HOST_HOME_STR}/.local/low",
+    "/home/testuser/.local/low",
+    "--bind-try",
+    f"{HOST_HOME_STR}/bbbb",
+    "/home/testuser/bbbb",
+)
 
-    def setUp(self):
-        """Set up a Bwrap instance with default parameters for testing."""
-        self.bwrap = Bwrap(
+
+def contains_seq(args, seq):
+    """Whether seq appears as a contiguous run in args"""
+    n = len(seq)
+    return any(args[i : i + n] == seq for i in range(len(args) - n + 1))
+
+
+class BwrapChecks:
+    """Checks run against every Bwrap fixture, mixed into each TestCase"""
+
+    profile: str | None = None
+
+    @classmethod
+    def setUpClass(cls):
+        """Build the Bwrap instance shared by every test once."""
+        cls._template = Bwrap(
             user="testuser",
             hostname="testhost",
+            profile=cls.profile,
             loglevel=10,
             etc_binds=("group", "passwd", "hostname"),
         )
-        self.args = " ".join(self.bwrap.args)
+
+    def setUp(self):
+        """Give each test its own copy of the shared Bwrap instance."""
+        self.bwrap = copy.copy(self._template)
+        self.bwrap.args = list(self._template.args)
+        self.home_str = str(self.bwrap.home)
 
     def clear_args(self):
         self.bwrap.args = []
 
+    def fake_pipe(self):
+        """Patch os.pipe2/write/close with stubs recording into self.writes/closed"""
+        self.writes = []
+        self.closed = []
+
+        def write(fd, data):
+            self.writes.append((fd, data))
+            return len(data)
+
+        return patch.multiple(
+            os, pipe2=lambda flags: (3, 4), write=write, close=self.closed.append
+        )
+
     def test_init_env_with_default_paths(self):
-        self.assertIn("--clearenv", self.bwrap.args)
-        self.assertIn("--setenv HOME", self.args)
-        self.assertIn("--setenv SHELL", self.args)
+        args = self.bwrap.args
+        self.assertIn("--clearenv", args)
+        self.assertTrue(contains_seq(args, ["--setenv", "HOME"]))
+        self.assertTrue(contains_seq(args, ["--setenv", "SHELL"]))
 
     def test_init_defaults(self):
-        self.assertIn("--tmpfs /tmp", self.args)
-        self.assertIn("--proc /proc", self.args)
-        self.assertIn("--dir /var", self.args)
-        self.assertIn("/etc", self.args)
-        self.assertIn("--hostname testhost", self.args)
+        args = self.bwrap.args
+        self.assertTrue(contains_seq(args, ["--tmpfs", "/tmp"]))
+        self.assertTrue(contains_seq(args, ["--proc", "/proc"]))
+        self.assertTrue(contains_seq(args, ["--dir", "/var"]))
+        self.assertTrue(any(arg.startswith("/etc") for arg in args))
+        self.assertTrue(contains_seq(args, ["--hostname", "testhost"]))
 
     def test_init_system_id_hostname(self):
-        self.assertIn("--unshare-uts", self.args)
-        self.assertIn("--hostname testhost", self.args)
+        self.assertIn("--unshare-uts", self.bwrap.args)
+        self.assertTrue(contains_seq(self.bwrap.args, ["--hostname", "testhost"]))
         self.assertEqual(self.bwrap.hostname, "testhost")
 
-    def test_bind(self):
-        src, dest = "/src/path", "/dest/path"
-        self.clear_args()
-        self.bwrap.bind(src, dest, mode=BindMode.RO)
-        self.assertEqual(["--ro-bind-try", src, dest], self.bwrap.args)
-        self.clear_args()
-        self.bwrap.bind(src, dest, mode=BindMode.DEV)
-        self.assertEqual(["--dev-bind-try", src, dest], self.bwrap.args)
-
-    def test_symlink(self):
-        self.clear_args()
-        self.bwrap.symlink(("/usr/lib", "/lib"), ("/usr/bin", "/bin"))
-        expected_args = [
-            "--symlink",
-            "/usr/lib",
-            "/lib",
-            "--symlink",
-            "/usr/bin",
-            "/bin",
-        ]
-        self.assertEqual(expected_args, self.bwrap.args)
-
-    def test_unsetenv(self):
-        self.clear_args()
-        self.bwrap.unsetenv("VAR1", "VAR2")
-        expected_args = ["--unsetenv", "VAR1", "--unsetenv", "VAR2"]
-        self.assertEqual(expected_args, self.bwrap.args)
-
     def test_bind_anchor(self):
         self.clear_args()
         self.bwrap.bind(HOME / ".cache")
         self.assertEqual(
-            [
+            (
                 "--ro-bind-try",
-                str(Path.home() / ".cache"),
-                str(self.bwrap.home / ".cache"),
-            ],
-            self.bwrap.args,
+                HOST_HOME_CACHE,
+                f"{self.home_str}/.cache",
+            ),
+            tuple(self.bwrap.args),
         )
 
     def test_bind_anchor_home_with_dest(self):
         self.clear_args()
         self.bwrap.bind(HOME / ".cache", HOME / "device/b", mode=BindMode.DEV)
         self.assertEqual(
-            [
+            (
                 "--dev-bind-try",
-                str(Path.home() / ".cache"),
-                str(self.bwrap.home / "device/b"),
-            ],
-            self.bwrap.args,
+                HOST_HOME_CACHE,
+                f"{self.home_str}/device/b",
+            ),
+            tuple(self.bwrap.args),
         )
 
     def test_bind_all_anchor_home(self):
@@ -102,90 +132,236 @@ class TestBwrap(unittest.TestCase):
             src_anchor=HOME,
             dest_anchor=self.bwrap.home,
         )
-        expected_args = [
-            "--ro-bind-try",
-            str(HOME / ".cache"),
-            "/home/testuser/host_cache",
-            "--ro-bind-try",
-            str(HOME / ".local/low"),
-            "/home/testuser/.local/low",
-            "--bind-try",
-            str(HOME / "bbbb"),
-            "/home/testuser/bbbb",
-        ]
-        self.assertEqual(expected_args, self.bwrap.args)
-
-    def test_file_creation(self):
-        content = "test content"
-        dest = "/etc/testfile.conf"
-        self.clear_args()
-        with patch("os.pipe", return_value=(3, 4)), patch("os.write") as mock_write:
-            self.bwrap.file(content, dest)
-            mock_write.assert_called_once_with(4, content.encode())
-            self.assertEqual(["--file", "3", dest], self.bwrap.args)
-
-    def test_bind_data(self):
-        content = "test content"
-        dest = "/etc/testfile.conf"
-        self.clear_args()
-        with patch("os.pipe", return_value=(3, 4)), patch("os.write") as mock_write:
-            self.bwrap.bind_data(content, dest)
-            mock_write.assert_called_once_with(4, content.encode())
-            self.assertEqual(["--ro-bind-data", "3", dest], self.bwrap.args)
-
-    def test_bind_data_home(self):
-        content = "test content"
-        dest = HOME / "testfile.conf"
-        self.clear_args()
-        with patch("os.pipe", return_value=(3, 4)), patch("os.write") as mock_write:
-            self.bwrap.bind_data(content, dest)
-            mock_write.assert_called_once_with(4, content.encode())
-            self.assertEqual(
-                ["--ro-bind-data", "3", "/home/testuser/testfile.conf"], self.bwrap.args
-            )
-
-    def test_bind_data_rw(self):
-        content = "test content"
-        dest = "/etc/testfile.conf"
-        self.clear_args()
-        with patch("os.pipe", return_value=(3, 4)), patch("os.write") as mock_write:
-            self.bwrap.bind_data(content, dest, mode=BindMode.RW)
-            mock_write.assert_called_once_with(4, content.encode())
-            self.assertEqual(["--bind-data", "3", dest], self.bwrap.args)
-
-    def test_bind_data_perms(self):
-        content = "test content"
-        dest = "/etc/testfile.conf"
-        self.clear_args()
-        with patch("os.pipe", return_value=(3, 4)), patch("os.write") as mock_write:
-            self.bwrap.bind_data(content, dest, perms="0775")
-            mock_write.assert_called_once_with(4, content.encode())
-            self.assertEqual(
-                ["--perms", "0775", "--ro-bind-data", "3", dest], self.bwrap.args
-            )
+        self.assertEqual(EXPECTED_BIND_ALL_ANCHOR_HOME_ARGS, tuple(self.bwrap.args))
 
     def test_bind_relative_path_to_host_home(self):
         self.clear_args()
-        self.bwrap.bind("/src", Path.home() / "dest")
+        self.bwrap.bind("/src", HOST_HOME / "dest")
         self.assertEqual(
-            ["--ro-bind-try", "/src", str(self.bwrap.home / "dest")], self.bwrap.args
+            ("--ro-bind-try", "/src", f"{self.home_str}/dest"), tuple(self.bwrap.args)
         )
 
     def test_resolve_path(self):
-        home = Path.home()
+        home = HOST_HOME
         resolve_path = self.bwrap.resolve_path
         self.assertEqual(resolve_path(home), self.bwrap.home)
         self.assertEqual(resolve_path(home / "src"), self.bwrap.home / "src")
         self.assertEqual(resolve_path("/src"), Path("/src"))
         self.assertEqual(resolve_path("src"), self.bwrap.cwd / "src")
         self.assertEqual(resolve_path("src", translate=False), Path.cwd() / "src")
+        self.assertEqual(resolve_path(f"{home}x/src"), Path(f"{home}x/src"))
+        self.assertEqual(resolve_path("src", anchor=home), self.bwrap.home / "src")
 
     def test_bind_relative_path(self):
         self.clear_args()
         self.bwrap.bind("/src", "dest")
-        expected_args = [
+        expected_args = (
             "--ro-bind-try",
             "/src",
             str(self.bwrap.resolve_path(Path.cwd()) / "dest"),
-        ]
-        self.assertEqual(expected_args, self.bwrap.args)
+        )
+        self.assertEqual(expected_args, tuple(self.bwrap.args))
+
+    def test_exec_translates_command_paths(self):
+        home = HOST_HOME_STR
+        command = ["cat", f"{home}/a", f"--file={home}/b", f"{home}x", "", "/etc"]
+        with (
+            patch("pybwrap.bwrap._bwrap_bin", return_value="/usr/bin/bwrap"),
+            # no real seccomp/args fds, execv never runs to take them over
+            patch.object(self.bwrap, "openfd", return_value=99),
+            patch("os.execv") as mock_exec,
+        ):
+            self.bwrap.exec(command)
+        mock_exec.assert_called_once()
+        self.assertEqual(
+            [
+                "cat",
+                "/home/testuser/a",
+                "--file=/home/testuser/b",
+                f"{home}x",
+                "",
+                "/etc",
+            ],
+            list(mock_exec.call_args.args[1][-6:]),
+        )
+
+
+class TestBwrap(BwrapChecks, unittest.TestCase):
+    def test_init_env_path(self):
+        bwrap = Bwrap(user="testuser", etc_binds=("group",), path=(".bin", "/usr/bin"))
+        i = bwrap.args.index("PATH")
+        self.assertEqual("/home/testuser/.bin:/usr/bin", bwrap.args[i + 1])
+
+    def test_init_default_hostname(self):
+        bwrap = Bwrap(etc_binds=("group",))
+        self.assertEqual(bwrap.hostname, f"sandbox-{os.getpid()}")
+
+    def test_bind(self):
+        src, dest = "/src/path", "/dest/path"
+        self.clear_args()
+        self.bwrap.bind(src, dest, mode=BindMode.RO)
+        self.assertEqual(("--ro-bind-try", src, dest), tuple(self.bwrap.args))
+        self.clear_args()
+        self.bwrap.bind(src, dest, mode=BindMode.DEV)
+        self.assertEqual(("--dev-bind-try", src, dest), tuple(self.bwrap.args))
+
+    def test_bind_repeated_keeps_order(self):
+        # bwrap mounts in argv order, so a repeated bind must be re-emitted
+        self.clear_args()
+        self.bwrap.bind("/a", "/d")
+        self.bwrap.bind("/b", "/d")
+        self.bwrap.bind_all({"src": "/a", "dest": "/d"})
+        self.assertEqual(
+            (
+                *("--ro-bind-try", "/a", "/d"),
+                *("--ro-bind-try", "/b", "/d"),
+                *("--ro-bind-try", "/a", "/d"),
+            ),
+            tuple(self.bwrap.args),
+        )
+
+    def test_bind_over_tmpfs(self):
+        self.clear_args()
+        self.bwrap.bind("/x")
+        self.bwrap.tmpfs("/x")
+        self.bwrap.bind("/x")
+        self.assertEqual(
+            ("--ro-bind-try", "/x", "/x", "--tmpfs", "/x", "--ro-bind-try", "/x", "/x"),
+            tuple(self.bwrap.args),
+        )
+
+    def test_paths_normalised(self):
+        self.clear_args()
+        self.bwrap.bind("/usr/")
+        self.bwrap.bind(f"{HOST_HOME_STR}/.cache/")
+        self.bwrap.dir("/a/./b//c")
+        self.bwrap.symlink(("/usr/lib", "/lib/"))
+        self.assertEqual(
+            (
+                *("--ro-bind-try", "/usr", "/usr"),
+                *("--ro-bind-try", HOST_HOME_CACHE, f"{self.home_str}/.cache"),
+                *("--dir", "/a/b/c"),
+                *("--symlink", "/usr/lib", "/lib"),
+            ),
+            tuple(self.bwrap.args),
+        )
+        self.assertEqual(
+            str(self.bwrap.resolve_path("a/./b/")), self.bwrap._resolve("a/./b/")
+        )
+        self.assertEqual("/", self.bwrap._resolve("/"))
+
+    def test_bind_unknown_option(self):
+        with self.assertRaises(TypeError):
+            self.bwrap.bind("/src", mdoe=BindMode.RW)
+
+    def test_symlink(self):
+        self.clear_args()
+        self.bwrap.symlink(("/usr/lib", "/lib"), ("/usr/bin", "/bin"))
+        self.assertEqual(EXPECTED_SYMLINK_ARGS, tuple(self.bwrap.args))
+
+    def test_unsetenv(self):
+        self.clear_args()
+        self.bwrap.unsetenv("VAR1", "VAR2")
+        self.assertEqual(EXPECTED_UNSETENV_ARGS, tuple(self.bwrap.args))
+
+    def test_keepenv(self):
+        self.clear_args()
+        with patch.dict("os.environ", {"VAR1": "1", "VAR3": "3"}, clear=True):
+            self.bwrap.keepenv("VAR1", "VAR2", "VAR3")
+        self.assertEqual(EXPECTED_KEEPENV_ARGS, tuple(self.bwrap.args))
+
+    def test_file_creation(self):
+        content = "test content"
+        dest = "/etc/testfile.conf"
+        self.clear_args()
+        with self.fake_pipe():
+            self.bwrap.file(content, dest)
+        self.assertEqual([(4, content.encode())], self.writes)
+        self.assertEqual([4], self.closed)
+        self.assertEqual(("--file", "3", dest), tuple(self.bwrap.args))
+
+    def test_openfd_large_content(self):
+        content = b"x" * 100000
+        fd = self.bwrap.openfd(content)
+        try:
+            self.assertTrue(os.get_inheritable(fd))
+            self.assertEqual(os.read(fd, len(content) + 1), content)
+        finally:
+            os.close(fd)
+
+    def test_bind_data(self):
+        content = "test content"
+        dest = "/etc/testfile.conf"
+        cases = (
+            ({}, dest, ("--ro-bind-data", "3", dest)),
+            (
+                {},
+                HOME / "testfile.conf",
+                ("--ro-bind-data", "3", "/home/testuser/testfile.conf"),
+            ),
+            ({"mode": BindMode.RW}, dest, ("--bind-data", "3", dest)),
+            ({"perms": "0775"}, dest, ("--perms", "0775", "--ro-bind-data", "3", dest)),
+        )
+        for opts, path, expected_args in cases:
+            with self.subTest(opts=opts, dest=path):
+                self.clear_args()
+                with self.fake_pipe():
+                    self.bwrap.bind_data(content, path, **opts)
+                self.assertEqual([(4, content.encode())], self.writes)
+                self.assertEqual(expected_args, tuple(self.bwrap.args))
+
+
+class TestPresentEtcBinds(unittest.TestCase):
+    def setUp(self):
+        _present_etc_binds.cache_clear()
+        self.addCleanup(_present_etc_binds.cache_clear)
+
+    def test_present_etc_binds(self):
+        entry = Mock()
+        entry.name = "passwd"
+        scandir = MagicMock()
+        scandir.return_value.__enter__.return_value = [entry]
+        paths = ("/etc/missing", "/etc/passwd", "/etc", "/etc/", "/etc/a/b", "/usr/x")
+        with patch("os.scandir", scandir):
+            self.assertEqual(
+                ("/etc/passwd", "/etc", "/etc/", "/etc/a/b", "/usr/x"),
+                _present_etc_binds(paths),
+            )
+        scandir.assert_called_once_with("/etc")
+
+    def test_present_etc_binds_unreadable(self):
+        paths = ("/etc/missing", "/etc/passwd")
+        with patch("os.scandir", side_effect=PermissionError):
+            self.assertEqual(paths, _present_etc_binds(paths))
+
+
+class TestBwrapSandbox(unittest.TestCase):
+    def test_feature_enabled_once(self):
+        sandbox = BwrapSandbox(etc_binds=("group",))
+        sandbox.mangohud()
+        self.assertEqual(1, sandbox.args.count("/dev/dri") // 2)
+        # enabled as a dependency of mangohud, so calling it again is a no-op
+        args = list(sandbox.args)
+        sandbox.gpu()
+        self.assertEqual(args, sandbox.args)
+
+    def test_feature_override_calls_super(self):
+        class Sandbox(BwrapSandbox):
+            @BwrapSandbox.feature()
+            def dbus(self):
+                self.setenv(EXTRA_BUS=1)
+                super().dbus()
+
+        sandbox = Sandbox(etc_binds=("group",))
+        sandbox.dbus()
+        self.assertTrue(contains_seq(sandbox.args, ["--setenv", "EXTRA_BUS", "1"]))
+        self.assertIn("/run/dbus", sandbox.args)
+
+    def test_feature_metadata(self):
+        @BwrapSandbox.feature()
+        def extra(self, flag=True):
+            pass
+
+        self.assertEqual("extra", extra.__name__)
+        self.assertEqual(__name__, extra.__module__)
+        self.assertEqual("(self, flag=True)", str(inspect.signature(extra)))
@@ -1,7 +1,8 @@
 from pathlib import Path
 import unittest
 
-from pybwrap.path import ensure_path
+from pybwrap.cli import BwrapArgumentParser, handle_binds, parse_binds, BindMode
+from pybwrap.path import ensure_path, ensure_paths
 
 
 class TestPath(unittest.TestCase):
@@ -10,6 +11,58 @@ class TestPath(unittest.TestCase):
         self.assertEqual(p, Path("/path"))
 
     def test_ensure_path_2(self):
-        p1, p2 = ensure_path("/path/1", Path("/path/2"))
-        self.assertEqual(p1, Path("/path/1"))
-        self.assertEqual(p2, Path("/path/2"))
+        self.assertEqual(
+            [Path("/path/1"), Path("/path/2")],
+            ensure_paths("/path/1", Path("/path/2")),
+        )
+
+
+class TestHandleBinds(unittest.TestCase):
+    def test_handle_binds(self):
+        binds = []
+        handle_binds(
+            ["/a", "/b:/c", "/d::w", "/e:/f:d"],
+            lambda src, dest, mode: binds.append((src, dest, mode)),
+        )
+        self.assertEqual(
+            [
+                (Path("/a"), Path("/a"), BindMode.RO),
+                (Path("/b"), Path("/c"), BindMode.RO),
+                (Path("/d"), Path("/d"), BindMode.RW),
+                (Path("/e"), Path("/f"), BindMode.DEV),
+            ],
+            binds,
+        )
+
+    def test_parse_binds(self):
+        self.assertEqual(
+            [
+                {"src": "/a", "dest": None, "mode": BindMode.RO},
+                {"src": "/d", "dest": None, "mode": BindMode.RW},
+                {"src": "/e", "dest": "/f", "mode": BindMode.DEV},
+            ],
+            parse_binds(["/a", "/d::w", "/e:/f:d"]),
+        )
+        with self.assertRaises(ValueError):
+            parse_binds(["/a:/b:x"])
+        with self.assertRaises(ValueError):
+            parse_binds([":/mnt"])
+
+
+class TestArgumentParser(unittest.TestCase):
+    def setUp(self):
+        self.parser = BwrapArgumentParser(enable_all_flags=True, default_cmd=["sh"])
+        self.parser.add_args_command()
+
+    def test_command_after_separator(self):
+        args = self.parser.parse_args(["-x", "--", "ls", "-x"])
+        self.assertTrue(args.x11)
+        self.assertEqual(["ls", "-x"], args.command)
+
+    def test_command_before_separator(self):
+        args = self.parser.parse_args(["-x", "ls", "--", "-a"])
+        self.assertEqual(["ls", "--", "-a"], args.command)
+
+    def test_default_command(self):
+        self.assertEqual(["sh"], self.parser.parse_args(["-x"]).command)
+        self.assertEqual(["sh"], self.parser.parse_args(["-x", "--"]).command)
@@ -0,0 +1,77 @@
+import importlib.util
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+_spec = importlib.util.spec_from_file_location(
+    "sample_profile", Path(__file__).parent.parent / "sample" / "profile.py"
+)
+sample_profile = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(sample_profile)
+
+
+class _DeferredFuture:
+    def __init__(self, fn, *args):
+        self.call = fn, args
+
+    def result(self):
+        fn, args = self.call
+        return fn(*args)
+
+
+class _DeferredPool:
+    """Executor that runs each job only when its result is asked for"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        return _DeferredFuture(fn, *args)
+
+
+class TestCopy(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.src = os.path.join(tmp.name, "src")
+        self.dest = os.path.join(tmp.name, "dest", "src")
+        os.makedirs(os.path.join(self.src, "sub"))
+        Path(self.src, "f1").write_text("1")
+        Path(self.src, "sub", "f2").write_text("2")
+        os.chmod(os.path.join(self.src, "sub"), 0o555)
+        # let the temporary directory clean up the read-only copies
+        self.addCleanup(self.make_writable, tmp.name)
+
+    @staticmethod
+    def make_writable(path):
+        for root, _, _ in os.walk(path):
+            os.chmod(root, 0o755)
+
+    def test_copy_read_only_dir(self):
+        copy2 = shutil.copy2
+
+        def checked_copy2(src, dest):
+            # root bypasses the permission check, so look at the mode instead
+            mode = os.stat(os.path.dirname(dest)).st_mode
+            self.assertTrue(mode & stat.S_IWUSR, f"{dest} copied into read-only dir")
+            return copy2(src, dest)
+
+        # no file is written until it is waited on, like the slowest workers
+        with (
+            patch("shutil.copy2", checked_copy2),
+            patch.object(sample_profile, "copy_pool", _DeferredPool),
+        ):
+            sample_profile.copy(self.src, self.dest)
+
+        self.assertEqual("1", Path(self.dest, "f1").read_text())
+        self.assertEqual("2", Path(self.dest, "sub", "f2").read_text())
+        self.assertEqual(
+            0o555, stat.S_IMODE(os.stat(os.path.join(self.dest, "sub")).st_mode)
+        )
@@ -0,0 +1,69 @@
+#!/usr/bin/python
+"""Bundle pybwrap into a single executable zipapp with precompiled bytecode
+
+    python tools/build_zipapp.py -o sandbox.pyz
+    python tools/build_zipapp.py -o swine.pyz -s sample/swine.py
+"""
+
+import argparse
+import compileall
+import shutil
+import sys
+import tempfile
+import zipapp
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", default="sandbox.pyz", help="Output file.")
+    parser.add_argument(
+        "-m",
+        "--main",
+        default="pybwrap.cli:main",
+        help="Entry point, as module:function.",
+    )
+    parser.add_argument(
+        "-s",
+        "--script",
+        type=Path,
+        help="Bundle a script and use its main() as entry point.",
+    )
+    parser.add_argument(
+        "-p",
+        "--python",
+        default="/usr/bin/env python3",
+        help="Interpreter for the shebang line.",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        staging = Path(tmp)
+        shutil.copytree(
+            ROOT / "src" / "pybwrap",
+            staging / "pybwrap",
+            ignore=shutil.ignore_patterns("__pycache__"),
+        )
+        main = args.main
+        if args.script:
+            shutil.copy(args.script, staging / "_script.py")
+            main = "_script:main"
+
+        # zipimport only loads .pyc files stored next to their sources
+        if not compileall.compile_dir(staging, quiet=1, legacy=True):
+            return 1
+
+        zipapp.create_archive(
+            staging,
+            args.output,
+            interpreter=args.python,
+            main=main,
+            compressed=True,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())